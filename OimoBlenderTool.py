@@ -1,7 +1,7 @@
 bl_info = {
     "name": "OimoBlenderTool",
     "author": "Your Name",
-    "version": (1, 2), # バージョン更新
+    "version": (1, 3), # バージョン更新 (グリッド整列を追加)
     "blender": (3, 0, 0),
     "location": "View3D > Sidebar > OimoTool",
     "description": "便利なショートカットとツールをまとめたアドオン",
@@ -10,6 +10,10 @@ bl_info = {
 
 import bpy
 import bmesh
+import math
+import time
+import numpy as np
+from mathutils import Matrix, Vector
 
 # ------------------------------------------------------------------------
 #   機能1: 床に接地 (その場で底面をZ=0に合わせる)
@@ -74,6 +78,313 @@ class VIEW3D_OT_OimoResetCursor(bpy.types.Operator):
         return {'FINISHED'}
 
 
+# ------------------------------------------------------------------------
+#   機能4: グリッド整列 (選択したアセットを床に重ならないよう並べる)
+# ------------------------------------------------------------------------
+# bound_box が意味を持つ(形状を持つ)オブジェクトタイプ
+BOUNDS_TYPES = {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT', 'CURVES', 'POINTCLOUD', 'VOLUME'}
+
+# 1つの矩形が占有してよいセル数の上限。これを超える巨大な障害物は線形リストで判定する
+MAX_CELLS_PER_RECT = 4096
+
+# 最大Zがこれ以下の障害物は床そのもの(地面プレーン等)とみなして無視する
+FLOOR_EPSILON = 1e-4
+
+
+def find_root_in_set(obj, object_set):
+    # 選択されていない親を挟んでいても、最上位の選択済み祖先をルートとする
+    root = obj
+    current = obj.parent
+    while current:
+        if current in object_set:
+            root = current
+        current = current.parent
+    return root
+
+
+def build_children_map(objects):
+    """親 -> 子リストの辞書を1回の走査で作る
+
+    Object.children は呼ぶたびに全オブジェクトを走査するため、大量の階層をたどる場合はこちらを使う。
+    """
+    children_map = {}
+    for obj in objects:
+        if obj.parent:
+            children_map.setdefault(obj.parent, []).append(obj)
+    return children_map
+
+
+def collect_hierarchy(obj, children_map, result):
+    result.append(obj)
+    for child in children_map.get(obj, ()):
+        collect_hierarchy(child, children_map, result)
+    return result
+
+
+def compute_world_bounds(objects):
+    """オブジェクト群のワールド空間AABBを一括で計算し (最小座標, 最大座標) を返す
+
+    形状を持たないオブジェクト(エンプティ、ライト等)は最小 +inf / 最大 -inf となり、
+    まとめて min / max を取ったときに結果へ影響しない。
+    """
+    count = len(objects)
+    corners = np.zeros((count, 8, 4))
+    corners[:, :, 3] = 1.0
+    matrices = np.empty((count, 4, 4))
+    has_bounds = np.zeros(count, dtype=bool)
+    for i, obj in enumerate(objects):
+        if obj.type in BOUNDS_TYPES:
+            corners[i, :, :3] = obj.bound_box
+            has_bounds[i] = True
+        matrices[i] = obj.matrix_world
+
+    world = np.einsum('nij,nkj->nki', matrices, corners)[:, :, :3]
+    mins = np.where(has_bounds[:, None], world.min(axis=1), np.inf)
+    maxs = np.where(has_bounds[:, None], world.max(axis=1), -np.inf)
+    return mins, maxs
+
+
+class SpatialHash:
+    """XY平面上の矩形 (x0, y0, x1, y1) を一様グリッドで管理し、重なり判定を高速化する"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.large = []
+        self.rects = []
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return (range(math.floor(x0 / size), math.floor(x1 / size) + 1),
+                range(math.floor(y0 / size), math.floor(y1 / size) + 1))
+
+    def insert(self, rect):
+        self.rects.append(rect)
+        xs, ys = self._cell_range(*rect)
+        if len(xs) * len(ys) > MAX_CELLS_PER_RECT:
+            self.large.append(rect)
+            return
+        for cx in xs:
+            for cy in ys:
+                self.cells.setdefault((cx, cy), []).append(rect)
+
+    def query(self, x0, y0, x1, y1):
+        """指定した矩形と重なる矩形をすべて返す (接しているだけのものは含まない)"""
+        xs, ys = self._cell_range(x0, y0, x1, y1)
+        if len(xs) * len(ys) > MAX_CELLS_PER_RECT:
+            # セルを走査するより全件を調べる方が速い
+            return [r for r in self.rects if r[0] < x1 and r[2] > x0 and r[1] < y1 and r[3] > y0]
+        hits = [r for r in self.large if r[0] < x1 and r[2] > x0 and r[1] < y1 and r[3] > y0]
+        # 複数セルにまたがる矩形を重複して返さないよう、判定済みのものを記録する
+        seen = set()
+        for cx in xs:
+            for cy in ys:
+                for r in self.cells.get((cx, cy), ()):
+                    if r in seen:
+                        continue
+                    seen.add(r)
+                    if r[0] < x1 and r[2] > x0 and r[1] < y1 and r[3] > y0:
+                        hits.append(r)
+        return hits
+
+
+def pack_shelves(sizes, origin, spacing, max_width, max_depth, obstacles=None):
+    """シェルフ法で矩形を左下から詰めて配置し、各矩形の最小角(X, Y)のリストを返す
+
+    max_width を超えると次の段(シェルフ)へ、max_depth(0で無制限)を超えると
+    右隣の新しいブロックへ折り返す。obstacles と重なる位置は飛ばして配置する。
+    obstacles の矩形はあらかじめ spacing 分広げて登録しておくこと。
+    """
+    origin_x, origin_y = origin
+    block_x = block_right = block_reach = origin_x
+    x, y = origin_x, origin_y
+    shelf_depth = 0.0
+    shelf_empty = True
+    blocked_top = None
+    positions = []
+
+    for w, d in sizes:
+        while True:
+            # 幅を超えたら次の段へ (段の先頭に置けない大きさのものはそのまま置く)
+            if x > block_x and x + w - block_x > max_width:
+                if shelf_empty and blocked_top is not None:
+                    # 障害物で段が埋まっていた場合は障害物の上端まで進める
+                    y = blocked_top
+                else:
+                    y += shelf_depth + spacing
+                x = block_x
+                shelf_depth = 0.0
+                shelf_empty = True
+                blocked_top = None
+                continue
+
+            # 奥行き制限を超えたら右隣に新しいブロックを作る
+            # (障害物で押し出された位置も含め、このブロックで到達した右端より必ず右から始める。
+            #  それでも進めない場合は奥行き制限を無視してそのまま置く)
+            if max_depth > 0.0 and y > origin_y and y + d - origin_y > max_depth:
+                next_x = max(block_right, block_reach) + spacing
+                if next_x > block_x:
+                    block_x = block_reach = x = next_x
+                    y = origin_y
+                    shelf_depth = 0.0
+                    shelf_empty = True
+                    blocked_top = None
+                    continue
+
+            if obstacles is None:
+                break
+            hits = obstacles.query(x, y, x + w, y + d)
+            if not hits:
+                break
+            # 重なった障害物の右側へずらして再判定
+            x = max(r[2] for r in hits)
+            block_reach = max(block_reach, x)
+            top = min(r[3] for r in hits)
+            blocked_top = top if blocked_top is None else min(blocked_top, top)
+
+        positions.append((x, y))
+        x += w + spacing
+        block_right = max(block_right, x - spacing)
+        shelf_depth = max(shelf_depth, d)
+        shelf_empty = False
+
+    return positions
+
+
+class OBJECT_OT_OimoArrangeGrid(bpy.types.Operator):
+    """選択したオブジェクト(親単位)を3Dカーソル位置から床(Z=0)に重ならないよう並べます"""
+    bl_idname = "object.oimo_arrange_grid"
+    bl_label = "グリッド整列 (Arrange)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    spacing: bpy.props.FloatProperty(
+        name="間隔",
+        description="オブジェクト同士の間隔",
+        default=0.5,
+        min=0.0,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+    sort_key: bpy.props.EnumProperty(
+        name="並び順",
+        items=[
+            ('NAME', "名前", "名前順に並べます"),
+            ('SIZE', "サイズ", "底面積の大きい順に並べます"),
+            ('POLYCOUNT', "ポリゴン数", "ポリゴン数(モディファイア適用後)の多い順に並べます"),
+        ],
+        default='NAME',
+    )
+    max_width: bpy.props.FloatProperty(
+        name="最大幅",
+        description="1段の最大幅 (X方向)。0の場合は正方形に近くなるよう自動で決めます",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+    max_depth: bpy.props.FloatProperty(
+        name="最大奥行き",
+        description="1ブロックの最大奥行き (Y方向)。超えた分は右隣に並べます。0で無制限",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+        unit='LENGTH',
+    )
+    avoid_existing: bpy.props.BoolProperty(
+        name="既存オブジェクトを避ける",
+        description="選択していない表示中のオブジェクトと重ならないように配置します",
+        default=True,
+    )
+
+    def execute(self, context):
+        start_time = time.perf_counter()
+
+        selected = set(context.selected_objects)
+        if not selected:
+            self.report({'WARNING'}, "オブジェクトを選択してください")
+            return {'CANCELLED'}
+
+        # 親子関係は親(ルート)単位でまとめて動かす
+        roots = list({find_root_in_set(obj, selected) for obj in selected})
+        children_map = build_children_map(context.scene.objects)
+        hierarchies = [collect_hierarchy(root, children_map, []) for root in roots]
+
+        context.view_layer.update()
+
+        # --- バウンディングボックスを一括計算 ---
+        arranged = [obj for hierarchy in hierarchies for obj in hierarchy]
+        arranged_set = set(arranged)
+        offsets = np.cumsum([0] + [len(h) for h in hierarchies[:-1]])
+        mins, maxs = compute_world_bounds(arranged)
+        root_mins = np.minimum.reduceat(mins, offsets, axis=0)
+        root_maxs = np.maximum.reduceat(maxs, offsets, axis=0)
+        # 階層内に形状が1つも無い場合のみ、ルートの原点を1点として扱う
+        for i in np.flatnonzero(~np.isfinite(root_mins[:, 0])):
+            root_mins[i] = root_maxs[i] = roots[i].matrix_world.translation
+        sizes = root_maxs[:, :2] - root_mins[:, :2]
+
+        # --- 並び順 ---
+        if self.sort_key == 'NAME':
+            order = sorted(range(len(roots)), key=lambda i: roots[i].name)
+        elif self.sort_key == 'SIZE':
+            areas = sizes[:, 0] * sizes[:, 1]
+            order = sorted(range(len(roots)), key=lambda i: (-areas[i], roots[i].name))
+        else:
+            # モディファイア適用後のポリゴン数で比べる (bound_box と同じく評価後の形状)
+            depsgraph = context.evaluated_depsgraph_get()
+            polycounts = [
+                sum(len(obj.evaluated_get(depsgraph).data.polygons)
+                    for obj in hierarchy if obj.type == 'MESH')
+                for hierarchy in hierarchies
+            ]
+            order = sorted(range(len(roots)), key=lambda i: (-polycounts[i], roots[i].name))
+
+        # --- 配置幅 (未指定なら全体が正方形に近くなる幅) ---
+        max_width = self.max_width
+        if max_width <= 0.0:
+            total_area = float(np.sum((sizes[:, 0] + self.spacing) * (sizes[:, 1] + self.spacing)))
+            max_width = max(math.sqrt(total_area), float(sizes[:, 0].max()))
+
+        # --- 既存オブジェクトを空間ハッシュに登録 ---
+        obstacles = None
+        if self.avoid_existing:
+            others = [
+                obj for obj in context.visible_objects
+                if obj not in arranged_set and obj.type in BOUNDS_TYPES
+            ]
+            if others:
+                other_mins, other_maxs = compute_world_bounds(others)
+                # 極端に大きいオブジェクトに引きずられないよう中央値を使う
+                cell_size = max(float(np.median(sizes.max(axis=1))) + self.spacing, 1e-3)
+                obstacles = SpatialHash(cell_size)
+                margin = self.spacing
+                for lo, hi in zip(other_mins, other_maxs):
+                    if hi[2] <= FLOOR_EPSILON:
+                        continue
+                    obstacles.insert((float(lo[0]) - margin, float(lo[1]) - margin,
+                                      float(hi[0]) + margin, float(hi[1]) + margin))
+
+        # --- パッキング ---
+        cursor = context.scene.cursor.location
+        positions = pack_shelves(
+            [(float(sizes[i, 0]), float(sizes[i, 1])) for i in order],
+            (cursor.x, cursor.y),
+            self.spacing,
+            max_width,
+            self.max_depth,
+            obstacles,
+        )
+
+        # --- 移動 (底面をZ=0に合わせる) ---
+        for i, (x, y) in zip(order, positions):
+            delta = Vector((x - root_mins[i, 0], y - root_mins[i, 1], -root_mins[i, 2]))
+            roots[i].matrix_world = Matrix.Translation(delta) @ roots[i].matrix_world
+
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"{len(roots)}個のオブジェクトを整列しました ({elapsed:.2f}秒)")
+        return {'FINISHED'}
+
+
 # ------------------------------------------------------------------------
 #   UIパネルの作成
 # ------------------------------------------------------------------------
@@ -93,6 +404,9 @@ class VIEW3D_PT_OimoPanel(bpy.types.Panel):
         row = layout.row()
         row.scale_y = 1.5
         row.operator(OBJECT_OT_OimoDropToFloor.bl_idname, text="床に接地 (Z=0)")
+        row = layout.row()
+        row.scale_y = 1.5
+        row.operator(OBJECT_OT_OimoArrangeGrid.bl_idname, text="グリッド整列", icon='GRID')
 
         layout.separator()
 
@@ -115,6 +429,7 @@ class VIEW3D_PT_OimoPanel(bpy.types.Panel):
 # ------------------------------------------------------------------------
 classes = (
     OBJECT_OT_OimoDropToFloor,
+    OBJECT_OT_OimoArrangeGrid,
     OBJECT_OT_OimoSetOriginToSelected,
     VIEW3D_OT_OimoResetCursor, # 追加
     VIEW3D_PT_OimoPanel,